@@ -1,41 +1,135 @@
+import asyncio
+import hmac
 import os
 import re
 import requests
+from requests.adapters import HTTPAdapter
 import socket
 import platform
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from quart import Quart, request, jsonify
+from quart.json.provider import DefaultJSONProvider
+from quart_cors import cors
+from quart_compress import Compress
+from youtube_transcript_api import (
+    NoTranscriptAvailable,
+    NoTranscriptFound,
+    TranscriptsDisabled,
+    VideoUnavailable
+)
 from youtube_transcript_api._api import YouTubeTranscriptApi as OriginalYTAPI
+from youtube_transcript_api._transcripts import TranscriptListFetcher
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for n8n requests
+# JSON provider backed by orjson for faster encoding of large transcript payloads
+class OrjsonProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SORT_KEYS if kwargs.get('sort_keys', self.sort_keys) else 0
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+app = Quart(__name__)
+app.json_provider_class = OrjsonProvider
+app.json = OrjsonProvider(app)
+app = cors(app, allow_origin='*')  # Enable CORS for n8n requests
+
+# Gzip JSON responses; transcript payloads repeat the same keys and compress well
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_LEVEL'] = 6
+app.config['COMPRESS_ALGORITHM'] = 'gzip'
+Compress(app)
+
+# youtube-transcript-api issues its requests without a timeout; bound them so a hung
+# YouTube socket cannot hold a fetch thread forever
+_HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', 30))
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    def __init__(self, *args, timeout=_HTTP_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=self.timeout if timeout is None else timeout, **kwargs)
+
+# Shared HTTP session so TCP/TLS connections to YouTube are pooled and reused across requests
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+})
+_HTTP_SESSION.mount('https://', TimeoutHTTPAdapter(pool_connections=32, pool_maxsize=32))
+_HTTP_SESSION.mount('http://', TimeoutHTTPAdapter())
 
 # Custom YouTube API class with proper headers to avoid blocking
 class CustomYouTubeTranscriptApi(OriginalYTAPI):
     @classmethod
     def _get_http_session(cls):
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        })
-        return session
+        return _HTTP_SESSION
+
+    @classmethod
+    def list_transcripts(cls, video_id, proxies=None, cookies=None):
+        # The base class opens a fresh session per call; use the shared one unless
+        # per-call proxies/cookies need an isolated session
+        if proxies or cookies:
+            return super().list_transcripts(video_id, proxies=proxies, cookies=cookies)
+        return TranscriptListFetcher(cls._get_http_session()).fetch(video_id)
+
+# Cache fetched transcripts so repeated requests for the same video skip the YouTube round-trip.
+# The cache lives in each Hypercorn worker process, so the total footprint is workers x this size.
+_TRANSCRIPT_CACHE_SIZE = int(os.environ.get('TRANSCRIPT_CACHE_SIZE', 256))
+
+@lru_cache(maxsize=_TRANSCRIPT_CACHE_SIZE)
+def _fetch_transcript(video_id, language):
+    return CustomYouTubeTranscriptApi.get_transcript(
+        video_id,
+        languages=[language, 'en']  # Try requested language, fallback to English
+    )
+
+# Size the thread pool used by asyncio.to_thread; it bounds how many YouTube fetches a
+# worker can overlap, and asyncio's default (min(32, cpu + 4)) is small on one or two vCPUs
+_FETCH_THREADS = int(os.environ.get('FETCH_THREADS', 16))
+
+@app.before_serving
+async def configure_fetch_executor():
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=_FETCH_THREADS, thread_name_prefix='fetch')
+    )
+
+# Known YouTube API errors -> (status code, error, error_type, debug_info)
+_ERROR_RESPONSES = {
+    NoTranscriptFound: (
+        404, 'No transcripts available for this video', 'no_transcript',
+        'This video may not have captions enabled or may be restricted in this region'
+    ),
+    NoTranscriptAvailable: (
+        404, 'No transcripts available for this video', 'no_transcript',
+        'This video may not have captions enabled or may be restricted in this region'
+    ),
+    VideoUnavailable: (
+        404, 'Video is unavailable or private', 'unavailable', None
+    ),
+    TranscriptsDisabled: (
+        404, 'Subtitles are disabled for this video', 'subtitles_disabled',
+        'Try a different video with captions enabled'
+    ),
+}
 
 # Health check endpoint
 @app.route('/', methods=['GET'])
-def health_check():
+async def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'YouTube Transcript API',
@@ -43,35 +137,70 @@ def health_check():
         'endpoints': {
             'transcript': '/transcript?url=YOUTUBE_URL',
             'languages': '/transcript/languages?url=YOUTUBE_URL',
-            'debug': '/debug'
+            'debug': '/debug',
+            'cache_clear': '/cache/clear (POST, X-Admin-Token header; clears the handling worker only)'
         }
     })
 
 # Add /api/health endpoint (same as root)
 @app.route('/api/health', methods=['GET'])
-def api_health_check():
-    return health_check()
+async def api_health_check():
+    return await health_check()
+
+# Server environment details are fixed for the process lifetime, so resolve them once
+try:
+    _SERVER_IP = socket.gethostbyname(socket.gethostname())
+except Exception:
+    _SERVER_IP = "Unable to determine"
+_PLATFORM = platform.platform()
+_PYTHON_VERSION = platform.python_version()
 
 # Debug endpoint to check server environment
 @app.route('/debug', methods=['GET'])
-def debug_info():
-    try:
-        server_ip = socket.gethostbyname(socket.gethostname())
-    except:
-        server_ip = "Unable to determine"
-    
+async def debug_info():
     return jsonify({
-        'server_ip': server_ip,
-        'platform': platform.platform(),
-        'python_version': platform.python_version(),
+        'server_ip': _SERVER_IP,
+        'platform': _PLATFORM,
+        'python_version': _PYTHON_VERSION,
         'environment': os.environ.get('FLASK_ENV', 'production'),
         'working_locally': False,
         'railway_deployment': True,
         'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
     })
 
+# Shared secret for admin endpoints; they stay disabled unless this is configured
+_ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Clear the transcript cache of the worker process that handles this request
+# (requires the X-Admin-Token header); other workers keep their own caches
+@app.route('/cache/clear', methods=['POST'])
+async def clear_cache():
+    if not _ADMIN_TOKEN:
+        return jsonify({
+            'success': False,
+            'error': 'Cache administration is disabled (ADMIN_TOKEN is not configured)'
+        }), 403
+    # Compare as bytes; compare_digest rejects str values containing non-ASCII characters
+    provided = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(provided.encode(), _ADMIN_TOKEN.encode()):
+        return jsonify({
+            'success': False,
+            'error': 'Invalid or missing X-Admin-Token header'
+        }), 401
+    
+    cleared = _fetch_transcript.cache_info().currsize
+    _fetch_transcript.cache_clear()
+    logger.info(f"Cleared {cleared} cached transcripts in worker {os.getpid()}")
+    return jsonify({
+        'success': True,
+        'scope': 'worker',
+        'worker_pid': os.getpid(),
+        'cleared_entries': cleared,
+        'note': 'Only this worker process was cleared; other workers keep their cached transcripts'
+    })
+
 @app.route('/transcript', methods=['GET'])
-def get_transcript():
+async def get_transcript():
     try:
         # Get parameters from URL query string
         video_url = request.args.get('url')
@@ -97,31 +226,34 @@ def get_transcript():
         
         logger.info(f"Fetching transcript for video: {video_id}")
         
-        # Fetch transcript from YouTube using custom API class
-        transcript_list = CustomYouTubeTranscriptApi.get_transcript(
-            video_id, 
-            languages=[language, 'en']  # Try requested language, fallback to English
-        )
+        # Fetch transcript (cached) using custom API class; the library is
+        # blocking, so run it in a worker thread to keep the event loop free
+        transcript_list = await asyncio.to_thread(_fetch_transcript, video_id, language)
+        
+        # Stats shared by both formats, gathered in a single pass; counting per segment
+        # avoids splitting the full joined transcript text into one large word list
+        word_count = 0
+        last_item = None
+        for item in transcript_list:
+            word_count += len(item['text'].split())
+            last_item = item
+        total_duration = last_item['start'] + last_item['duration'] if last_item else 0
         
         # Format response based on requested format
         if format_type == 'text':
-            # Return as plain text
-            formatter = TextFormatter()
-            formatted_transcript = formatter.format_transcript(transcript_list)
+            # Return as plain text, one segment per line (same output as TextFormatter)
+            formatted_transcript = '\n'.join([item['text'] for item in transcript_list])
             response_data = {
                 'success': True,
                 'video_id': video_id,
                 'language': language,
                 'format': 'text',
                 'transcript': formatted_transcript,
-                'word_count': len(formatted_transcript.split()),
-                'duration_seconds': transcript_list[-1]['start'] + transcript_list[-1]['duration'] if transcript_list else 0
+                'word_count': word_count,
+                'duration_seconds': total_duration
             }
         else:
             # Return as JSON with timestamps (default)
-            total_duration = transcript_list[-1]['start'] + transcript_list[-1]['duration'] if transcript_list else 0
-            word_count = sum(len(item['text'].split()) for item in transcript_list)
-            
             response_data = {
                 'success': True,
                 'video_id': video_id,
@@ -137,43 +269,31 @@ def get_transcript():
         return jsonify(response_data)
         
     except Exception as e:
-        error_message = str(e)
-        logger.error(f"Error fetching transcript: {error_message}")
+        logger.error(f"Error fetching transcript: {e}")
         
-        # Handle specific YouTube API errors
-        if "No transcripts were found" in error_message:
-            return jsonify({
-                'success': False,
-                'error': 'No transcripts available for this video',
-                'error_type': 'no_transcript',
-                'video_id': video_id if 'video_id' in locals() else None,
-                'debug_info': 'This video may not have captions enabled or may be restricted in this region'
-            }), 404
-        elif "Video unavailable" in error_message:
-            return jsonify({
+        # Handle specific YouTube API errors by exception type
+        known_error = _ERROR_RESPONSES.get(type(e))
+        if known_error:
+            status_code, error, error_type, debug_info = known_error
+            response_data = {
                 'success': False,
-                'error': 'Video is unavailable or private',
-                'error_type': 'unavailable',
+                'error': error,
+                'error_type': error_type,
                 'video_id': video_id if 'video_id' in locals() else None
-            }), 404
-        elif "Subtitles are disabled" in error_message:
-            return jsonify({
-                'success': False,
-                'error': 'Subtitles are disabled for this video',
-                'error_type': 'subtitles_disabled',
-                'video_id': video_id if 'video_id' in locals() else None,
-                'debug_info': 'Try a different video with captions enabled'
-            }), 404
-        else:
-            return jsonify({
-                'success': False,
-                'error': error_message,
-                'error_type': 'unknown',
-                'debug_info': 'This might be a regional restriction or server IP blocking issue'
-            }), 500
+            }
+            if debug_info:
+                response_data['debug_info'] = debug_info
+            return jsonify(response_data), status_code
+        
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'error_type': 'unknown',
+            'debug_info': 'This might be a regional restriction or server IP blocking issue'
+        }), 500
 
 @app.route('/transcript/languages', methods=['GET'])
-def get_available_languages():
+async def get_available_languages():
     """Get available transcript languages for a video"""
     try:
         video_url = request.args.get('url')
@@ -193,7 +313,10 @@ def get_available_languages():
             }), 400
         
         # Get available transcript languages using custom API class
-        transcript_list = CustomYouTubeTranscriptApi.list_transcripts(video_id)
+        transcript_list = await asyncio.to_thread(
+            CustomYouTubeTranscriptApi.list_transcripts,
+            video_id
+        )
         
         languages = []
         for transcript in transcript_list:
@@ -220,21 +343,19 @@ def get_available_languages():
             'debug_info': 'This might be a regional restriction or server IP blocking issue'
         }), 500
 
+# Single alternation covering every supported URL prefix, compiled once at import time
+_VIDEO_ID_RE = re.compile(r'(?:v=|\/|embed\/|watch\?v=|youtu\.be\/|youtube\.com\/shorts\/)([0-9A-Za-z_-]{11})')
+_BARE_ID_RE = re.compile(r'[0-9A-Za-z_-]{11}')
+
 def extract_video_id(url):
     """Extract video ID from various YouTube URL formats"""
-    patterns = [
-        r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
-        r'(?:embed\/)([0-9A-Za-z_-]{11})',
-        r'(?:watch\?v=)([0-9A-Za-z_-]{11})',
-        r'(?:youtu\.be\/)([0-9A-Za-z_-]{11})',
-        r'(?:youtube\.com\/shorts\/)([0-9A-Za-z_-]{11})'
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    return None
+    # Fast path: input is already a bare video ID
+    if len(url) == 11 and _BARE_ID_RE.fullmatch(url):
+        return url
+    match = _VIDEO_ID_RE.search(url)
+    return match.group(1) if match else None
 
+# Local development only; production is served by Hypercorn with multiple workers (see Procfile)
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
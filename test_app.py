@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+import app as app_module
+from app import app, extract_video_id
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ',
+    'https://youtu.be/dQw4w9WgXcQ',
+    'https://youtu.be/dQw4w9WgXcQ?t=42',
+    'https://www.youtube.com/embed/dQw4w9WgXcQ',
+    'https://youtube.com/shorts/dQw4w9WgXcQ',
+])
+def test_extract_video_id_from_url(url):
+    assert extract_video_id(url) == VIDEO_ID
+
+
+def test_extract_video_id_from_bare_id():
+    assert extract_video_id(VIDEO_ID) == VIDEO_ID
+
+
+@pytest.mark.parametrize('url', [
+    'https://example.com/',
+    'not a url',
+    'dQw4w9WgXc!',
+])
+def test_extract_video_id_rejects_invalid_input(url):
+    assert extract_video_id(url) is None
+
+
+def post(path, **kwargs):
+    async def send():
+        response = await app.test_client().post(path, **kwargs)
+        return response.status_code, await response.get_json()
+    return asyncio.run(send())
+
+
+def test_clear_cache_disabled_without_admin_token(monkeypatch):
+    monkeypatch.setattr(app_module, '_ADMIN_TOKEN', None)
+    status_code, _ = post('/cache/clear', headers={'X-Admin-Token': 'anything'})
+    assert status_code == 403
+
+
+def test_clear_cache_rejects_wrong_admin_token(monkeypatch):
+    monkeypatch.setattr(app_module, '_ADMIN_TOKEN', 'secret')
+    status_code, _ = post('/cache/clear', headers={'X-Admin-Token': 'wrong'})
+    assert status_code == 401
+
+
+def test_clear_cache_rejects_non_ascii_admin_token(monkeypatch):
+    monkeypatch.setattr(app_module, '_ADMIN_TOKEN', 'secret')
+    status_code, data = post('/cache/clear', headers={'X-Admin-Token': 'sécret'})
+    assert status_code == 401
+    assert data['success'] is False
+
+
+def test_clear_cache_with_admin_token(monkeypatch):
+    monkeypatch.setattr(app_module, '_ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(
+        app_module.CustomYouTubeTranscriptApi, 'get_transcript',
+        lambda video_id, languages: [{'text': 'hello', 'start': 0.0, 'duration': 1.0}]
+    )
+    app_module._fetch_transcript.cache_clear()
+    app_module._fetch_transcript(VIDEO_ID, 'en')
+    assert app_module._fetch_transcript.cache_info().currsize == 1
+
+    status_code, data = post('/cache/clear', headers={'X-Admin-Token': 'secret'})
+    assert status_code == 200
+    assert data['success'] is True
+    assert data['scope'] == 'worker'
+    assert data['cleared_entries'] == 1
+    assert app_module._fetch_transcript.cache_info().currsize == 0